@@ -13,19 +13,21 @@ class Hub:
     def __init__(self, hass: HomeAssistant, address: str) -> None:
         """Init dummy hub."""
         self.address = address
+        self.address_upper = address.upper()
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Govee BLE device from a config entry."""
     address = entry.unique_id
     assert address is not None
-    ble_device = bluetooth.async_ble_device_from_address(hass, address.upper(), True)
+    hub = Hub(hass, address=address)
+    ble_device = bluetooth.async_ble_device_from_address(hass, hub.address_upper, True)
     if not ble_device:
         raise ConfigEntryNotReady(
             f"Could not find LED BLE device with address {address}"
         )
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = Hub(hass, address=address)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
@@ -1,6 +1,7 @@
 # from https://github.com/wez/govee-py/blob/main/govee_led_wez/kelvin_rgb.py
 
 import math
+from functools import lru_cache
 from typing import Tuple
 
 
@@ -9,6 +10,7 @@ def clamp(value: int, lower: int, upper: int) -> int:
     return max(min(value, upper), lower)
 
 
+@lru_cache(maxsize=1024)
 def kelvin_to_rgb(
     kelvin: int,
 ) -> Tuple[int, int, int]:
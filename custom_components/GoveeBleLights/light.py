@@ -3,11 +3,13 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import asyncio
 import logging
-import random
 _LOGGER = logging.getLogger(__name__)
-import math
+import random
+import struct
 from enum import IntEnum
 import time
+from contextlib import suppress
+from functools import lru_cache, partial
 import bleak_retry_connector
 
 from bleak import BleakClient, BleakScanner, BLEDevice
@@ -24,7 +26,8 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util.dt import utcnow
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util.dt import utc_from_timestamp
 
 
 from .const import DOMAIN
@@ -36,20 +39,87 @@ UUID_CONTROL_CHARACTERISTIC = '00010203-0405-0607-0809-0a0b0c0d2b11'
 
 PARALLEL_UPDATES = 1
 
-MAX_ACTIVE_DEVICES = 1
-
-# devices trying to connect
-queued_devices = {}
-# devices connected and sending packets
-active_devices = {}
-# devices connected but not needed
-stale_devices = {}
-
-def clamp(value, min_value, max_value):
-    return max(min(value, max_value), min_value)
-
-def is_in_range(value, min_value, max_value):
-    return value >= min_value and value <= max_value
+# devices allowed to stay connected at once
+MAX_ACTIVE_DEVICES = 4
+
+# state attributes that also record when they were last set
+RECORD_LAST_DEVICE_UPDATE = frozenset({
+    "connection_status",
+    "ble_status",
+    "command_sent",
+})
+
+# color payload layouts, kelvin is big endian
+# led_mode, 0x01, r, g, b, kelvin, wr, wg, wb, 0xFFFF, 0x00
+COLOR_PAYLOAD_1501 = struct.Struct(">BBBBBHBBBHB")
+# led_mode, r, g, b, kelvin, wr, wg, wb
+COLOR_PAYLOAD = struct.Struct(">BBBBHBBB")
+
+# dirty attribute bits
+DIRTY_STATE = 0x1
+DIRTY_BRIGHTNESS = 0x2
+DIRTY_COLOR = 0x4
+
+# reconnect delays double per attempt up to this ceiling
+RECONNECT_BACKOFF_MAX = 64 # seconds
+# how long a removed light's pooled client waits for a reloaded light to claim it
+POOL_RELEASE_DELAY = 30 # seconds
+
+# ble status of each device keyed by mac address:
+# Queued - trying to connect, Active - connected and sending packets, Stale - connected but not needed
+device_states: Dict[str, str] = {}
+# number of devices in each ble status
+device_state_counts: Dict[str, int] = {"Queued": 0, "Active": 0, "Stale": 0}
+
+# connected clients keyed by mac address, they outlive entity reloads
+client_pool: Dict[str, BleakClient] = {}
+# entity currently owning each mac address, receives its client's disconnects
+light_entities: Dict[str, GoveeBluetoothLight] = {}
+# cancel callbacks of pending releases of pooled clients nobody owns
+pool_releases: Dict[str, Callable[[], None]] = {}
+# one connection attempt at a time across all lights, they share the adapter
+connect_semaphore = asyncio.Semaphore(1)
+
+def _client_disconnected(mac, client):
+    """Forward a pooled client's disconnect to the entity that currently owns it."""
+    client_pool.pop(mac, None)
+    light = light_entities.get(mac)
+    if light is not None:
+        light._on_disconnected(client)
+
+async def _release_pooled_client(mac, _now=None):
+    """Disconnect a pooled client that no light claimed after its entity was removed."""
+    pool_releases.pop(mac, None)
+    if mac in light_entities:
+        return
+    client = client_pool.pop(mac, None)
+    if client is None or not client.is_connected:
+        return
+    try:
+        _LOGGER.debug("Releasing unclaimed connection to %s", mac)
+        await client.disconnect()
+    except Exception as exception:
+        _LOGGER.error("Error releasing connection to %s: %s", mac, exception)
+
+@lru_cache(maxsize=512)
+def _build_frame(cmd: int, payload: bytes) -> bytes:
+    """Build a 20 byte control frame: 0x33, cmd, zero padded payload, XOR checksum."""
+    frame = bytearray(20)
+    frame[0] = 0x33
+    frame[1] = cmd
+    frame[2:2 + len(payload)] = payload
+
+    # The checksum is calculated by XORing all data bytes. Fold the 19 data
+    # bytes as one integer instead of looping over them in Python.
+    checksum = int.from_bytes(frame[:19], "little")
+    checksum ^= checksum >> 128
+    checksum ^= checksum >> 64
+    checksum ^= checksum >> 32
+    checksum ^= checksum >> 16
+    checksum ^= checksum >> 8
+    frame[19] = checksum & 0xFF
+
+    return bytes(frame)
 
 async def async_setup_entry(
         hass: HomeAssistant,
@@ -59,13 +129,17 @@ async def async_setup_entry(
     """Set up the light from a config entry."""
     light = hass.data[DOMAIN][config_entry.entry_id]
     #bluetooth setup
-    ble_device = bluetooth.async_ble_device_from_address(hass, light.address.upper(), False)
+    ble_device = bluetooth.async_ble_device_from_address(hass, light.address_upper, False)
     async_add_entities([GoveeBluetoothLight(hass, light, ble_device, config_entry)])
 
 class GoveeBluetoothLight(LightEntity):
-    MAX_RECONNECT_ATTEMPTS = 5
+    MAX_RECONNECT_ATTEMPTS = 6
     INITIAL_RECONNECT_DELAY = 1 # seconds
+    CONNECT_ATTEMPTS = 3 # quick attempts per connect, the semaphore is released between them
+    CONNECT_RETRY_DELAY = 0.25 # seconds
     DEVICE_PING_INTERVAL = 30 # seconds
+    CANCEL_TIMEOUT = 2 # seconds
+    IDLE_KEEP_ALIVE_TIMEOUT = 60 # seconds without a user action before keep alive stops
 
     ble_device: Optional[BLEDevice] = None
 
@@ -84,29 +158,46 @@ class GoveeBluetoothLight(LightEntity):
     def __init__(self, hass, light, ble_device, config_entry: ConfigEntry) -> None:
         """Initialize an bluetooth light."""
         self._mac = light.address
+        self._address_upper = light.address_upper
         _LOGGER.debug("Config entry data: %s", config_entry.data)
         self._hass = hass
+        self._unique_id = self._mac.replace(":", "")
         self._model = config_entry.data.get("model", "default")
-        self._name = config_entry.data.get("name", self._model + "-" + self._mac.replace(":", "")[-4:])
+        self._name = config_entry.data.get("name", self._model + "-" + self._unique_id[-4:])
+        self._led_mode = ModelInfo.get(self._model, "led_mode")
+        # the payload layout only depends on the model, pick it once
+        self._build_color_payload = (
+            self._build_color_payload_1501 if self._led_mode == LedMode.MODE_1501
+            else self._build_color_payload_default
+        )
+        self._brightness_max = ModelInfo.get(self._model, "brightness_max")
+        self._min_kelvin = ModelInfo.get(self._model, "min_kelvin")
+        self._max_kelvin = ModelInfo.get(self._model, "max_kelvin")
+
         self._ble_device = ble_device
         self._state = None
         self._is_on = False
         self._brightness = 255
         self._temperature = 4000
-        self._rgb_color = [255,255,255]
+        self._rgb_color = (255, 255, 255)
         self._client = None
+        # resolved control characteristic of the current connection, uuid until connected
+        self._control_char = UUID_CONTROL_CHARACTERISTIC
+        # set when the characteristic only accepts acknowledged writes, logged once
+        self._write_response = False
+        self._warned_write_response = False
         self._control_mode = ColorMode.RGB
         
         self._attr_extra_state_attributes = {}
+        # last_* attribute timestamps, only formatted when the attributes are read
+        self._attr_timestamps = {}
 
         self.updater = ThrottledUpdater(self._hass, self.update_light_state)
 
         # dirty attributes to be updated
-        self._dirty_state = False
-        self._dirty_brightness = False
-        self._dirty_color = False
+        self._dirty = 0
 
-        self._temp_rgb_color = [255,255,255]
+        self._temp_rgb_color = (255, 255, 255)
         self._temp_brightness = 255
         self._temp_state = False
 
@@ -116,9 +207,20 @@ class GoveeBluetoothLight(LightEntity):
         self._rgb_color_data = [0,0,0]
 
         self._reconnect = 0
-        self._last_device_update = time.time()
         self._ping_roll = 0
+        # when the next keep-alive tick is due on the event loop clock, advanced by one second per tick
+        self._loop = hass.loop
+        self._next_ping_at = self._loop.time()
         self._keep_alive_task = None
+        # set whenever there are dirty attributes for the packets thread to send
+        self._dirty_event = asyncio.Event()
+        self._last_user_action = time.monotonic()
+        self._disconnected_callback = partial(_client_disconnected, self._mac)
+
+        # serializes GATT writes to this light only, other lights never wait on it
+        self._io_lock = asyncio.Lock()
+        # coalesces concurrent connection attempts to the same light
+        self._connect_lock = asyncio.Lock()
 
     @property
     def should_poll(self):
@@ -136,7 +238,7 @@ class GoveeBluetoothLight(LightEntity):
     @property
     def unique_id(self) -> str:
         """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._mac.replace(":", "")
+        return self._unique_id
 
     @property
     def brightness(self):
@@ -168,19 +270,26 @@ class GoveeBluetoothLight(LightEntity):
             model=self._model,
         )
     
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes, formatting timestamps only when read."""
+        attributes = dict(self._attr_extra_state_attributes)
+        for key, timestamp in self._attr_timestamps.items():
+            attributes[key] = utc_from_timestamp(timestamp).isoformat()
+        return attributes
+
     def update(self):
         """Update the light state."""
         return True
 
     def set_state_attr(self, key, value):
-        self._attr_extra_state_attributes[key] = value
-        record_last_device_update = {
-            "connection_status" : True,
-            "ble_status" : True,
-            "command_sent" : True,
-        }
-        if key in record_last_device_update:
-            self._attr_extra_state_attributes["last_" + key] = utcnow().isoformat()
+        attributes = self._attr_extra_state_attributes
+        # only command_sent records every write, other attributes only record changes
+        if key != "command_sent" and key in attributes and attributes[key] == value:
+            return
+        attributes[key] = value
+        if key in RECORD_LAST_DEVICE_UPDATE:
+            self._attr_timestamps["last_" + key] = time.time()
 
     async def update_light_state(self):
         """
@@ -190,78 +299,113 @@ class GoveeBluetoothLight(LightEntity):
             - ble connection/disconnection
             - every few keep alive packets
         """
-        self._attr_extra_state_attributes["last_state_update"] = utcnow().isoformat()
+        self._attr_timestamps["last_state_update"] = time.time()
         self.async_write_ha_state()
 
     async def async_added_to_hass(self):
         """Run when entity about to be added to hass."""
         _LOGGER.debug("Adding %s", self.name)
         # await self._connect()
+        light_entities[self._mac] = self
+        # a reloaded light keeps the pooled client of its previous instance
+        cancel_release = pool_releases.pop(self._mac, None)
+        if cancel_release is not None:
+            cancel_release()
+        self._keep_alive_task = self._hass.async_create_background_task(
+            self._send_packets_thread(), f"{DOMAIN} {self.unique_id} packets"
+        )
         _LOGGER.debug("Initialized %s", self.name)
 
     async def async_will_remove_from_hass(self):
         """Run when entity will be removed from hass."""
         _LOGGER.debug("Removing %s", self.name)
         await self._cancel_packets_thread()
+        # drop the module-level references so the entity can be freed,
+        # a connected client stays pooled for a while in case the light is reloaded
+        self._remove_device_from_dicts()
+        if light_entities.get(self._mac) is self:
+            del light_entities[self._mac]
+            if self._mac in client_pool and self._mac not in pool_releases:
+                pool_releases[self._mac] = async_call_later(
+                    self._hass, POOL_RELEASE_DELAY, partial(_release_pooled_client, self._mac)
+                )
 
     async def async_turn_on(self, **kwargs) -> None:
-        _LOGGER.debug(
-            "async turn on %s %s with %s",
-            self.name,
-            self.model,
-            kwargs,
-        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "async turn on %s %s with %s",
+                self.name,
+                self.model,
+                kwargs,
+            )
         
+        # attributes the light already shows are not marked dirty again
+        _is_on = bool(self._state)
+
+        self._last_user_action = time.monotonic()
         self._temp_state = True
-        self._dirty_state = True
-        self.set_state_attr("dirty_state", self._dirty_state)
+        if not _is_on:
+            self._dirty |= DIRTY_STATE
+            self.set_state_attr("dirty_state", True)
 
 
-        if ATTR_BRIGHTNESS in kwargs:
-            brightness = kwargs.get(ATTR_BRIGHTNESS, 255)
+        brightness = kwargs.get(ATTR_BRIGHTNESS)
+        brightness_pct = kwargs.get(ATTR_BRIGHTNESS_PCT)
+        rgb_color = kwargs.get(ATTR_RGB_COLOR)
+        color_temp = kwargs.get(ATTR_COLOR_TEMP)
 
+        if brightness is not None:
             self._temp_brightness = brightness
-            self._dirty_brightness = True
-            self.set_state_attr("dirty_brightness", self._dirty_brightness)
-        elif ATTR_BRIGHTNESS_PCT in kwargs:
-            brightness_pct = kwargs.get(ATTR_BRIGHTNESS_PCT, 100)
-
-            self._temp_brightness = brightness_pct * 255 / 100
-            self._dirty_brightness = True
-            self.set_state_attr("dirty_brightness", self._dirty_brightness)
-
-        if ATTR_RGB_COLOR in kwargs:
-            red, green, blue = kwargs.get(ATTR_RGB_COLOR)
-
+            if not _is_on or brightness != self._brightness:
+                self._dirty |= DIRTY_BRIGHTNESS
+                self.set_state_attr("dirty_brightness", True)
+        elif brightness_pct is not None:
+            self._temp_brightness = (int(brightness_pct) * 255 + 50) // 100
+            if not _is_on or self._temp_brightness != self._brightness:
+                self._dirty |= DIRTY_BRIGHTNESS
+                self.set_state_attr("dirty_brightness", True)
+
+        if rgb_color is not None:
+            rgb_color = tuple(rgb_color)
+
+            _changed = not _is_on or self._control_mode != ControlMode.COLOR or rgb_color != self._rgb_color
             self._control_mode = ControlMode.COLOR
-            self._temp_rgb_color = [red, green, blue]
-            self._dirty_color = True
-            self.set_state_attr("dirty_rgb_color", self._dirty_color)
-        elif ATTR_COLOR_TEMP in kwargs:
-            color_temp = kwargs.get(ATTR_COLOR_TEMP)
+            self._temp_rgb_color = rgb_color
+            if _changed:
+                self._dirty |= DIRTY_COLOR
+                self.set_state_attr("dirty_rgb_color", True)
+        elif color_temp is not None:
             kelvin = (1000000 / color_temp)
 
-            kelvin = clamp(kelvin, self._attr_min_color_temp_kelvin, self._attr_max_color_temp_kelvin)
+            _min_kelvin = self._attr_min_color_temp_kelvin
+            _max_kelvin = self._attr_max_color_temp_kelvin
+            kelvin = _min_kelvin if kelvin < _min_kelvin else (_max_kelvin if kelvin > _max_kelvin else kelvin)
+            _changed = not _is_on or self._control_mode != ControlMode.TEMPERATURE or int(kelvin) != self._temperature
             self._control_mode = ControlMode.TEMPERATURE
             self._temperature = int(kelvin)
-            self._dirty_color = True
-            red, green, blue = kelvin_to_rgb(kelvin)
-            self._temp_rgb_color = [red, green, blue]
-            self.set_state_attr("dirty_rgb_color", self._dirty_color)
+            # mired conversion drifts by a few kelvin, quantize so the cached lookup hits
+            self._temp_rgb_color = kelvin_to_rgb(int(kelvin + 5) // 10 * 10)
+            if _changed:
+                self._dirty |= DIRTY_COLOR
+                self.set_state_attr("dirty_rgb_color", True)
 
-        await self._cancel_packets_thread()
-        self._keep_alive_task = self._hass.async_create_task(self._send_packets_thread())
+        if self.is_dirty():
+            self._dirty_event.set()
 
         
 
     async def async_turn_off(self, **kwargs) -> None:
 
         self._temp_state = False
-        self._dirty_state = True
-        self.set_state_attr("dirty_state", self._dirty_state)
+        # a light known to be off is left alone, unless a turn on is still pending
+        if self._state is False and not self._dirty & DIRTY_STATE:
+            return
 
-        await self._cancel_packets_thread()
-        self._keep_alive_task = self._hass.async_create_task(self._send_packets_thread())
+        self._last_user_action = time.monotonic()
+        self._dirty |= DIRTY_STATE
+        self.set_state_attr("dirty_state", True)
+
+        self._dirty_event.set()
 
 
     async def _send_power(self, power):
@@ -269,7 +413,7 @@ class GoveeBluetoothLight(LightEntity):
         self.set_state_attr("power_data", 0x1 if power else 0x0)
 
         try:
-            return await self._send_bluetooth_data(LedCommand.POWER, [0x1 if power else 0x0])
+            return await self._send_bluetooth_data(LedCommand.POWER, b"\x01" if power else b"\x00")
         
         except Exception as exception:
             _LOGGER.error("Error sending power to %s: %s", self.name, exception)
@@ -279,12 +423,11 @@ class GoveeBluetoothLight(LightEntity):
 
     async def _send_brightness(self, brightness):
         """Send the brightness to the device."""
-        brightness_max = ModelInfo.get(self.model, "brightness_max") #ModelInfo.get_brightness_max(self.model)
-        brightness = math.floor(brightness / 255 * brightness_max)
+        brightness = (int(brightness) * self._brightness_max) // 255
         self.set_state_attr("brightness_data", brightness)
 
-        _packet = [brightness]
         try:
+            _packet = bytes((brightness,))
             return await self._send_bluetooth_data(LedCommand.BRIGHTNESS, _packet)
     
         except Exception as exception:
@@ -295,9 +438,7 @@ class GoveeBluetoothLight(LightEntity):
 
     async def _send_rgb_color(self):
 
-        _R = self._temp_rgb_color[0];
-        _G = self._temp_rgb_color[1];
-        _B = self._temp_rgb_color[2];
+        _R, _G, _B = self._temp_rgb_color
 
         _TK = 0;
         _WR = 0;
@@ -305,10 +446,7 @@ class GoveeBluetoothLight(LightEntity):
         _WB = 0;
 
 
-        model_min_kelvin = ModelInfo.get(self.model, "min_kelvin")
-        model_max_kelvin = ModelInfo.get(self.model, "max_kelvin")
-
-        if self._control_mode == ControlMode.TEMPERATURE and is_in_range(self._temperature, model_min_kelvin, model_max_kelvin):
+        if self._control_mode == ControlMode.TEMPERATURE and self._min_kelvin <= self._temperature <= self._max_kelvin:
             brightness = self._brightness / 255
             _R = _G = _B = 0xFF;
             _TK = int(self._temperature);
@@ -328,52 +466,7 @@ class GoveeBluetoothLight(LightEntity):
         
 
         try:
-            led_mode = ModelInfo.get(self.model, "led_mode")
-            _payload = [led_mode]
-
-            if led_mode == LedMode.MODE_1501:
-                    
-                    _payload.extend([
-                        0x01,
-                        _R,
-                        _G,
-                        _B,
-                        (_TK >> 8) & 0xFF,
-                        _TK & 0xFF,
-                        _WR,
-                        _WG,
-                        _WB,
-                        (-1 >> 8) & 0xFF,
-                        -1 & 0xFF,
-                        0,
-                    ])
-                    """
-                    _payload.extend([
-                        0x01,
-                        _R,
-                        _G,
-                        _B,
-                        0x00,
-                        0x00,
-                        0x00,
-                        0x00,
-                        0x00,
-                        0xFF,
-                        0x74,
-                    ])"""
-            else: #MODE_D and MODE_2
-                _payload.extend([
-                    _R,
-                    _G,
-                    _B,
-                    (_TK >> 8) & 0xFF,
-                    _TK & 0xFF,
-                    _WR,
-                    _WG,
-                    _WB,
-                ])
-                #_payload.extend([red, green, blue])
-            
+            _payload = self._build_color_payload(_R, _G, _B, _TK, _WR, _WG, _WB)
             return await self._send_bluetooth_data(LedCommand.COLOR, _payload)
             
         except Exception as exception:
@@ -381,91 +474,104 @@ class GoveeBluetoothLight(LightEntity):
 
         return False
 
+    def _build_color_payload_1501(self, r, g, b, kelvin, wr, wg, wb):
+        return COLOR_PAYLOAD_1501.pack(self._led_mode, 0x01, r, g, b, kelvin, wr, wg, wb, 0xFFFF, 0x00)
+
+    def _build_color_payload_default(self, r, g, b, kelvin, wr, wg, wb):
+        # MODE_D and MODE_2
+        return COLOR_PAYLOAD.pack(self._led_mode, r, g, b, kelvin, wr, wg, wb)
+
+    async def _send_full_state(self):
+        """Resend power, brightness and color back-to-back."""
+        return (
+            await self._send_power(self._state)
+            and await self._send_brightness(self._brightness)
+            and await self._send_rgb_color()
+        )
+
     def is_dirty(self):
-        return self._dirty_state or self._dirty_brightness or self._dirty_color
+        return self._dirty != 0
+
+    def _set_ble_status(self, status):
+        """Move the device to the given ble status, None removes it."""
+        previous = device_states.get(self._mac)
+        if previous != status:
+            if previous is not None:
+                device_state_counts[previous] -= 1
+            if status is None:
+                del device_states[self._mac]
+            else:
+                device_states[self._mac] = status
+                device_state_counts[status] += 1
+        self.set_state_attr("ble_status", status or "Removed")
 
     def _add_to_queue(self):
         """Add the device to the queue."""
-        if active_devices.get(self._ble_device):
-            active_devices.pop(self._ble_device)
-        if stale_devices.get(self._ble_device):
-            stale_devices.pop(self._ble_device)
-        if not queued_devices.get(self._ble_device):
-            queued_devices[self._ble_device] = self
-        self.set_state_attr("ble_status", "Queued")
+        self._set_ble_status("Queued")
     
     def _add_to_active(self):
         """Add the device to the active devices."""
-        if queued_devices.get(self._ble_device):
-            queued_devices.pop(self._ble_device)
-        if stale_devices.get(self._ble_device):
-            stale_devices.pop(self._ble_device)
-        if not active_devices.get(self._ble_device):
-            active_devices[self._ble_device] = self
-        self.set_state_attr("ble_status", "Active")
+        self._set_ble_status("Active")
 
     def _add_to_stale(self):
         """Add the device to the stale devices."""
-        if queued_devices.get(self._ble_device):
-            queued_devices.pop(self._ble_device)
-        if active_devices.get(self._ble_device):
-            active_devices.pop(self._ble_device)
-        if not stale_devices.get(self._ble_device):
-            stale_devices[self._ble_device] = self
-        self.set_state_attr("ble_status", "Stale")
+        self._set_ble_status("Stale")
 
     def _remove_device_from_dicts(self):
-        """Remove the device from the dictionaries."""
-        if queued_devices.get(self._ble_device):
-            queued_devices.pop(self._ble_device)
-        if active_devices.get(self._ble_device):
-            active_devices.pop(self._ble_device)
-        if stale_devices.get(self._ble_device):
-            stale_devices.pop(self._ble_device)
-        self.set_state_attr("ble_status", "Removed")
+        """Remove the device from the device states."""
+        self._set_ble_status(None)
 
     def _should_close_stale_connection(self):
         """Check if the stale connection should be closed."""
-        if self._ping_roll > 0:
+        if time.monotonic() - self._last_user_action > self.IDLE_KEEP_ALIVE_TIMEOUT:
             return True
         
         if self._client is None or not self._client.is_connected:
             return True
 
-        _total_devices = len(active_devices) + len(stale_devices)
-        _LOGGER.debug("Total devices: %s", _total_devices)
-        if _total_devices < MAX_ACTIVE_DEVICES:
+        _total_devices = device_state_counts["Active"] + device_state_counts["Stale"]
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Total devices: %s", _total_devices)
+        # this device is one of the connected ones, keep it while within the cap
+        if _total_devices <= MAX_ACTIVE_DEVICES:
             return False
-        else:
-            return True
+
+        # over the cap, only the least recently used stale light gives up its connection
+        _stale = [light_entities[mac] for mac, status in device_states.items() if status == "Stale" and mac in light_entities]
+        return min(_stale, key=lambda light: light._last_user_action, default=None) is self
 
     async def _cancel_packets_thread(self):
         """Cancel the packets thread."""
-        try:
-            _max_timeout = 10 
-            _max_attempts = 50
-            _attempts = 0
-            _start_time = time.time()
-            while self._keep_alive_task is not None and not self._keep_alive_task.done():
-                if time.time() >= _start_time + _max_timeout or _attempts >= _max_attempts:
-                    _LOGGER.error("Failed to cancel keep alive task for %s: %s attempts", self.name, _attempts)
-                    return False
-                _attempts += 1
-                self._keep_alive_task.cancel()
-                _LOGGER.debug("Cancelling keep alive task for %s", self.name)
-                await asyncio.sleep(0.1 + (0.1 * _attempts))
-            _LOGGER.debug("Cancelled keep alive task for %s", self.name)
-
-            self._reconnect = 0
-            self._keep_alive_task = None
-
+        task = self._keep_alive_task
+        self._keep_alive_task = None
+        self._reconnect = 0
+        if task is None or task.done():
             return True
+
+        task.cancel()
+        try:
+            with suppress(asyncio.CancelledError):
+                await asyncio.wait_for(task, timeout=self.CANCEL_TIMEOUT)
         except Exception as exception:
             _LOGGER.error("Error cancelling keep alive task for %s: %s", self.name, exception)
             return False
 
+        _LOGGER.debug("Cancelled keep alive task for %s", self.name)
+        return True
+
     async def _send_packets_thread(self):
-        """Send the packets to the device."""
+        """Wait for dirty attributes and send them, for the lifetime of the entity."""
+        try:
+            while True:
+                await self._dirty_event.wait()
+                self._dirty_event.clear()
+                await self._send_packets()
+        except asyncio.CancelledError:
+            await self._handle_disconnect()
+            raise
+
+    async def _send_packets(self):
+        """Send the packets to the device until the connection goes stale."""
         task_running = True
         self._reconnect = 0
 
@@ -474,7 +580,7 @@ class GoveeBluetoothLight(LightEntity):
             try:
 
                 # if client was previously not connected, this is their first time. set to queue. otherwise it's an active/stale device that's still running
-                if not active_devices.get(self._ble_device) and not stale_devices.get(self._ble_device):
+                if device_states.get(self._mac) not in ("Active", "Stale"):
                     self._add_to_queue()
                     
 
@@ -486,80 +592,96 @@ class GoveeBluetoothLight(LightEntity):
                     if self._reconnect > self.MAX_RECONNECT_ATTEMPTS:
                         _LOGGER.error("Failed to connect to %s after %s attempts", self.name, self.MAX_RECONNECT_ATTEMPTS)
                         task_running = False
-                        await self._handle_disconnect()
+                        await self._close_connection()
                         continue
 
                     self._add_to_queue()
-                    jitter = self._reconnect * random.uniform(0.1, 0.3)
-                    await asyncio.sleep(0.9 + jitter)
+                    # back off while idle, a new command retries right away
+                    _delay = min(RECONNECT_BACKOFF_MAX, self.INITIAL_RECONNECT_DELAY * 2 ** (self._reconnect - 1))
+                    await self._wait_for_dirty(_delay + random.uniform(0, _delay / 4))
                     continue
 
                 _changed = True # send mqtt packet once mqtt is implemented
 
                 if self.is_dirty():
                     self._add_to_active()
-            
-                """Send the packets."""
-                if self._dirty_state:
-                    self._state = self._temp_state
-                    if not await self._send_power(self._temp_state):
-                        await asyncio.sleep(0.9);
-                        continue
-
-                    self._dirty_state = False
-                    self.set_state_attr("dirty_state", self._dirty_state)
-                elif self._dirty_brightness:
-                    self._brightness = self._temp_brightness
-                    if not await self._send_brightness(self._temp_brightness):
-                        await asyncio.sleep(0.9);
-                        continue
-
-                    self._dirty_brightness = False
-                    self.set_state_attr("dirty_brightness", self._dirty_brightness)
-                elif self._dirty_color:
-                    self._rgb_color = self._temp_rgb_color
-                    if not await self._send_rgb_color():
-                        await asyncio.sleep(0.9);
-                        continue
 
-                    self._dirty_color = False
-                    self.set_state_attr("dirty_rgb_color", self._dirty_color)
+                    """Send every dirty attribute back-to-back on the same connection."""
+                    if self._dirty & DIRTY_STATE:
+                        self._state = self._temp_state
+                        if not await self._send_power(self._temp_state):
+                            await self._wait_for_dirty(0.9)
+                            continue
+
+                        self._dirty &= ~DIRTY_STATE
+                        self.set_state_attr("dirty_state", False)
+
+                    if self._dirty & DIRTY_BRIGHTNESS:
+                        self._brightness = self._temp_brightness
+                        if not await self._send_brightness(self._temp_brightness):
+                            await self._wait_for_dirty(0.9)
+                            continue
+
+                        self._dirty &= ~DIRTY_BRIGHTNESS
+                        self.set_state_attr("dirty_brightness", False)
+
+                    if self._dirty & DIRTY_COLOR:
+                        self._rgb_color = self._temp_rgb_color
+                        if not await self._send_rgb_color():
+                            await self._wait_for_dirty(0.9)
+                            continue
+
+                        self._dirty &= ~DIRTY_COLOR
+                        self.set_state_attr("dirty_rgb_color", False)
+
+                    # one state write per flush, keep-alive pings don't change anything visible
+                    self.updater.request_update()
+                    self._next_ping_at = self._loop.time() + 1
                 else:
                     """Keep alive, send a packet every 1 second."""
                     _changed = False # no mqtt packet if no change
 
+                    # nothing left to send, on or off the light can give up its connection
+                    self._add_to_stale()
+
                     # if connection failed or other device needs to connect, disconnect
                     if self._should_close_stale_connection():
-                        _LOGGER.debug("Closing stale connection for %s", self.name)
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug("Closing stale connection for %s", self.name)
                         task_running = False
 
                         self._ping_roll = 0
                         self.set_state_attr("ping_roll", self._ping_roll)
-                        await self._handle_disconnect()
+                        await self._close_connection()
+                        continue
                     elif self._ping_roll % 30 == 0:
                         self.updater.request_update()
 
-                    if self._state:
-                        self._add_to_stale()
-                    
-
-                    if (time.time() - self._last_device_update) >= 1:
+                    _now = self._loop.time()
+                    if _now >= self._next_ping_at:
+                        # tick whether or not a packet goes out, skip ticks missed while busy
+                        self._next_ping_at += 1
+                        if self._next_ping_at <= _now:
+                            self._next_ping_at = _now + 1
                         _async_res = False
                         self._ping_roll += 1
 
-                        _ping_interval = self.DEVICE_PING_INTERVAL * 3
+                        # the idle timeout closes the connection and resets the roll,
+                        # so the refresh window has to fit inside it to ever fire
+                        _ping_interval = min(self.DEVICE_PING_INTERVAL * 3, self.IDLE_KEEP_ALIVE_TIMEOUT // 2)
 
-                        if self._ping_roll % _ping_interval == 0 or self._state == 0:
+                        if not self._state:
                             _async_res = await self._send_power(self._state);
-                        elif self._ping_roll % _ping_interval == 1:
-                            _async_res = await self._send_brightness(self._brightness);
-                        elif self._ping_roll % _ping_interval == 2:
-                            _async_res = await self._send_rgb_color();
+                        elif self._ping_roll % _ping_interval == 0:
+                            _async_res = await self._send_full_state();
                         
                         self.set_state_attr("ping_roll", self._ping_roll)
                         
 
-                    await asyncio.sleep(0.1)
+                    if task_running:
+                        # sleep until the next ping is due, new dirty attributes wake the loop early.
+                        # the deadline is on the clock wait_for schedules with, so no floor is needed
+                        await self._wait_for_dirty(self._next_ping_at - self._loop.time())
                     continue
                 
                 if _changed:
@@ -572,14 +694,57 @@ class GoveeBluetoothLight(LightEntity):
             except Exception as exception:
                 _LOGGER.error("Error sending packets to %s: %s", self.name, exception)
                 task_running = False
-                await self._handle_disconnect()
+                # no status entry or live client may outlive the loop
+                await self._close_connection()
                 await asyncio.sleep(1)
 
 
 
 
 
+    async def _wait_for_dirty(self, timeout):
+        """Sleep for up to timeout seconds, new dirty attributes end the wait early."""
+        try:
+            await asyncio.wait_for(self._dirty_event.wait(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+        self._dirty_event.clear()
+
+    def _on_disconnected(self, client):
+        """Handle the BLE client reporting a disconnect."""
+        _LOGGER.debug("Disconnected from %s", self.name)
+        self._remove_device_from_dicts()
+        self._client = None
+        self._control_char = UUID_CONTROL_CHARACTERISTIC
+        self.set_state_attr("connection_status", "Disconnected")
+        self._reconnect = 0
+        self._ping_roll = 0
+        self.set_state_attr("ping_roll", self._ping_roll)
+        self.updater.request_update()
+
+    def _use_client(self, client):
+        """Adopt a connected client."""
+        self._client = client
+        self._reconnect = 0
+        # resolve the characteristic once instead of looking up the uuid on every write
+        self._control_char = client.services.get_characteristic(UUID_CONTROL_CHARACTERISTIC) or UUID_CONTROL_CHARACTERISTIC
+        properties = getattr(self._control_char, "properties", None)
+        self._write_response = properties is not None and "write-without-response" not in properties
+        if self._write_response and not self._warned_write_response:
+            self._warned_write_response = True
+            _LOGGER.warning("%s does not support write without response, falling back to slower acknowledged writes", self.name)
+        self.set_state_attr("connection_status", "Connected")
+
+    def _latest_ble_device(self):
+        """Return the freshest advertised device from the shared scanner."""
+        return bluetooth.async_ble_device_from_address(self._hass, self._address_upper, True) or self._ble_device
+
     async def _connect(self):
+        """Connect to the device, concurrent callers wait for the same attempt."""
+        async with self._connect_lock:
+            return await self._connect_unlocked()
+
+    async def _connect_unlocked(self):
 
         if self._client != None and self._client.is_connected:
             return self._client
@@ -591,16 +756,11 @@ class GoveeBluetoothLight(LightEntity):
             _LOGGER.error("Aborted connect: Failed to disconnect from inactive %s", self.name)
             return None
 
-        def disconnected_callback(client):
-            _LOGGER.debug("Disconnected from %s", self.name)
-            self._remove_device_from_dicts()
-            self._client = None
-            self.set_state_attr("connection_status", "Disconnected")
-            self._reconnect = 0
-            self._ping_roll = 0
-            self.set_state_attr("ping_roll", self._ping_roll)
-            self._last_device_update = time.time()
-            self.updater.request_update()
+        pooled = client_pool.get(self._mac)
+        if pooled is not None and pooled.is_connected:
+            # reuse the connection left behind by a previous instance of this light
+            self._use_client(pooled)
+            return True
 
         try:
             '''
@@ -610,15 +770,41 @@ class GoveeBluetoothLight(LightEntity):
 
             self.set_state_attr("connection_status", "Establishing")
 
-            client = await bleak_retry_connector.establish_connection(
-                BleakClient,
-                self._ble_device, 
-                self.unique_id,
-                disconnected_callback=disconnected_callback,
-                # timeout=10.0  # Adjust the timeout as needed
-            )
-            self._client = client
-            self.set_state_attr("connection_status", "Connected")
+            # the service cache skips gatt discovery when reconnecting to a known device.
+            # the semaphore is held for one attempt at a time so an unreachable light
+            # can't block the others, quick retries absorb one-off connect failures
+            for _attempt in range(1, self.CONNECT_ATTEMPTS + 1):
+                try:
+                    async with connect_semaphore:
+                        client = await bleak_retry_connector.establish_connection(
+                            bleak_retry_connector.BleakClientWithServiceCache,
+                            self._ble_device, 
+                            self.unique_id,
+                            disconnected_callback=self._disconnected_callback,
+                            use_services_cache=True,
+                            ble_device_callback=self._latest_ble_device,
+                            max_attempts=1,
+                            # timeout=10.0  # Adjust the timeout as needed
+                        )
+                    break
+                except Exception as exception:
+                    if _attempt == self.CONNECT_ATTEMPTS:
+                        raise
+                    _LOGGER.debug("Connect attempt %s to %s failed: %s", _attempt, self.name, exception)
+                    await asyncio.sleep(self.CONNECT_RETRY_DELAY)
+            client_pool[self._mac] = client
+            self._use_client(client)
+
+            if isinstance(self._control_char, str):
+                # cached services without the control characteristic are stale (e.g. after
+                # a firmware update), drop them so the next connect rediscovers services
+                _LOGGER.warning("Control characteristic missing on %s, clearing the service cache", self.name)
+                try:
+                    await client.clear_cache()
+                except Exception as exception:
+                    _LOGGER.error("Error clearing the service cache of %s: %s", self.name, exception)
+                await self._close_connection()
+                return None
 
             return self._client.is_connected
         except Exception as exception:
@@ -637,6 +823,7 @@ class GoveeBluetoothLight(LightEntity):
                 _LOGGER.debug("Disconnecting from %s", self.name)
                 self.set_state_attr("connection_status", "Disconnecting")
                 await self._client.disconnect()
+                client_pool.pop(self._mac, None)
                 self._client = None
                 _LOGGER.debug("Disconnected from %s", self.name)
                 self.set_state_attr("connection_status", "Disconnected")
@@ -647,37 +834,53 @@ class GoveeBluetoothLight(LightEntity):
         
     
 
+    async def _close_connection(self):
+        """Disconnect a live connection and release its pooled client."""
+        client = self._client
+        self._client = None
+        self._control_char = UUID_CONTROL_CHARACTERISTIC
+        if client_pool.get(self._mac) is client:
+            del client_pool[self._mac]
+        self._remove_device_from_dicts()
+        if client is None:
+            return
+
+        try:
+            if client.is_connected:
+                _LOGGER.debug("Disconnecting from %s", self.name)
+                self.set_state_attr("connection_status", "Disconnecting")
+                await client.disconnect()
+            self.set_state_attr("connection_status", "Disconnected")
+        except Exception as exception:
+            self.set_state_attr("connection_status", "Failed to disconnect")
+            _LOGGER.error("Error disconnecting from %s: %s", self.name, exception)
+        self.updater.request_update()
+
     async def _send_bluetooth_data(self, cmd, payload):
-        if not isinstance(cmd, int):
-            raise ValueError('Invalid command')
-        if not isinstance(payload, bytes) and not (isinstance(payload, list) and all(isinstance(x, int) for x in payload)):
-            raise ValueError('Invalid payload')
-        if len(payload) > 17:
-            raise ValueError('Payload too long')
+        # callers are internal and always pass a LedCommand and a bytes-like payload
+        assert isinstance(cmd, int) and len(payload) <= 17
 
-        _LOGGER.debug("Sending command %s with payload %s to %s", cmd, payload, self.name)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Sending command %s with payload %s to %s", cmd, payload, self.name)
 
         cmd = cmd & 0xFF
+        # frames are cached per payload, which needs an immutable key
         payload = bytes(payload)
 
-        frame = bytes([0x33, cmd]) + bytes(payload)
-        # pad frame data to 19 bytes (plus checksum)
-        frame += bytes([0] * (19 - len(frame)))
-        
-        # The checksum is calculated by XORing all data bytes
-        checksum = 0
-        for b in frame:
-            checksum ^= b
-        
-        frame += bytes([checksum & 0xFF])
+        frame = _build_frame(cmd, payload)
 
+        # connecting is the packet thread's job, never reconnect per write
+        if self._client is None or not self._client.is_connected:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Not connected to %s, dropping command %s", self.name, cmd)
+            return False
 
         try:
-            await self._client.write_gatt_char(UUID_CONTROL_CHARACTERISTIC, frame, False)
-            self._last_device_update = time.time()
+            async with self._io_lock:
+                await self._client.write_gatt_char(self._control_char, frame, response=self._write_response)
             self.set_state_attr("command_sent", cmd)
-            _LOGGER.debug("Sent data to %s: %s", self.name, frame)
-            self.updater.request_update()
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Sent data to %s: %s", self.name, frame)
             return True
         except Exception as exception:
             _LOGGER.error("Error sending data to %s: %s", self.name, exception)
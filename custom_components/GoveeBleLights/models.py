@@ -1,4 +1,6 @@
 from enum import IntEnum
+from functools import lru_cache
+from typing import NamedTuple
 
 class LedCommand(IntEnum):
     """ A control command packet's type. """
@@ -24,65 +26,42 @@ class ControlMode(IntEnum):
     TEMPERATURE = 0x02
 
 
+class ModelConfig(NamedTuple):
+    """Protocol details and limits of a light model."""
+    led_mode: int
+    brightness_max: int
+    min_kelvin: int
+    max_kelvin: int
+
+
+# default min/max kelvin values will display to frontend for all lights
+# set individual models' min/max kelvin to its true values
+# setting kelvin outside of an individual model's range will convert to rgb approximation
+# a zero value falls back to the default model's value
+_MODEL_TABLE: dict[str, ModelConfig] = {
+    "default": ModelConfig(LedMode.MODE_2, 255, 1000, 6500),
+    "H6008": ModelConfig(LedMode.MODE_D, 100, 2700, 6500),
+    "H6046": ModelConfig(LedMode.MODE_1501, 100, 1500, 6500),
+    "H6072": ModelConfig(LedMode.MODE_1501, 100, 0, 0),
+    "H6076": ModelConfig(LedMode.MODE_1501, 100, 3300, 4300),
+}
+_DEFAULT_MODEL = _MODEL_TABLE["default"]
+
+
 class ModelInfo:
     """Class to store information about different models of lights."""
 
-    # default min/max kelvin values will display to frontend for all lights
-    # set individual models' min/max kelvin to its true values
-    # setting kelvin outside of an individual model's range will convert to rgb approximation
-    MODELS = {
-        "default": {
-            "led_mode": LedMode.MODE_2, 
-            "brightness_max": 255,
-            "min_kelvin": 1000,
-            "max_kelvin": 6500,
-        },
-        "H6008": {
-            "led_mode": LedMode.MODE_D, 
-            "brightness_max": 100,
-            "min_kelvin": 2700,
-            "max_kelvin": 6500,
-        },
-        "H6046": {
-            "led_mode": LedMode.MODE_1501, 
-            "brightness_max": 100,
-            "min_kelvin": 1500,
-            "max_kelvin": 6500,
-        },
-        "H6072": {
-            "led_mode": LedMode.MODE_1501, 
-            "brightness_max": 100,
-            "min_kelvin": 0,
-            "max_kelvin": 0,
-        },
-        "H6076": {
-            "led_mode": LedMode.MODE_1501, 
-            "brightness_max": 100,
-            "min_kelvin": 3300,
-            "max_kelvin": 4300,
-        },
-        
-    }
+    MODELS = _MODEL_TABLE
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get(model, key):
-        if model in ModelInfo.MODELS and ModelInfo.MODELS[model][key]:
-            return ModelInfo.MODELS[model][key]
-        else:
-            return ModelInfo.MODELS["default"][key]
+        return getattr(_MODEL_TABLE.get(model, _DEFAULT_MODEL), key) or getattr(_DEFAULT_MODEL, key)
 
     @staticmethod
     def get_led_mode(model):
-        if model in ModelInfo.MODELS and ModelInfo.MODELS[model]["led_mode"]:
-            return ModelInfo.MODELS[model]["led_mode"]
-        else:
-            return ModelInfo.MODELS["default"]["led_mode"]
+        return ModelInfo.get(model, "led_mode")
     
     @staticmethod
     def get_brightness_max(model):
-        if model in ModelInfo.MODELS and ModelInfo.MODELS[model]["brightness_max"]:
-            return ModelInfo.MODELS[model]["brightness_max"]
-        else:
-            return ModelInfo.MODELS["default"]["brightness_max"]
-    
-
+        return ModelInfo.get(model, "brightness_max")